@@ -1,76 +1,84 @@
+import argparse
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from math import sqrt
 
+import numpy as np
 import pandas as pd
 
+import data_io
+from data_io import load_datasets
+
 BASE_DIR = os.path.dirname(__file__)
-DATA_DIR = os.path.join(BASE_DIR, "mock_data")
 REPORT_DIR = os.path.join(BASE_DIR, "report")
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
-def load_datasets():
-    users = pd.read_csv(os.path.join(DATA_DIR, "users.csv"), parse_dates=["signup_date"])
-    sessions = pd.read_csv(
-        os.path.join(DATA_DIR, "sessions.csv"), parse_dates=["start_time", "end_time"]
-    )
-    feature_usage = pd.read_csv(
-        os.path.join(DATA_DIR, "feature_usage.csv"), parse_dates=["usage_timestamp"]
-    )
-    feedback = pd.read_csv(os.path.join(DATA_DIR, "feedback.csv"))
-    return users, sessions, feature_usage, feedback
+def summarize_active_counts(series: pd.Series, observed_key: str) -> dict:
+    return {
+        observed_key: int(series.shape[0]),
+        "average": float(series.mean()),
+        "median": float(series.median()),
+        "max": int(series.max()),
+        "min": int(series.min()),
+    }
 
 
 def compute_activity_metrics(sessions: pd.DataFrame):
-    sessions = sessions.copy()
-    sessions["date"] = sessions["start_time"].dt.date
-    sessions["week"] = sessions["start_time"].dt.to_period("W-MON")
-
-    dau = sessions.groupby("date")["user_id"].nunique().sort_index()
-    wau = sessions.groupby("week")["user_id"].nunique().sort_index()
-
-    dau_summary = {
-        "days_observed": int(dau.shape[0]),
-        "average": float(dau.mean()),
-        "median": float(dau.median()),
-        "max": int(dau.max()),
-        "min": int(dau.min()),
-    }
+    # Deduplicate (day, user) pairs once; both reductions then run over the
+    # much smaller pair set instead of re-hashing the full sessions column.
+    pairs = pd.DataFrame(
+        {"date": sessions["start_time"].dt.normalize(), "user_id": sessions["user_id"]}
+    ).drop_duplicates()
 
-    wau_summary = {
-        "weeks_observed": int(wau.shape[0]),
-        "average": float(wau.mean()),
-        "median": float(wau.median()),
-        "max": int(wau.max()),
-        "min": int(wau.min()),
-    }
+    dau = pairs.groupby("date").size().sort_index()
+    dau.index = dau.index.date
+
+    weeks = pd.Series(
+        data_io.monday_week_starts(pairs["date"].values), index=pairs.index, name="week"
+    )
+    wau = (
+        pairs.groupby([weeks, "user_id"]).size().groupby(level="week").size().sort_index()
+    )
+    wau.index = wau.index.values.astype("datetime64[D]").astype(object)
+
+    dau_summary = summarize_active_counts(dau, "days_observed")
+    wau_summary = summarize_active_counts(wau, "weeks_observed")
 
     return dau, wau, dau_summary, wau_summary
 
 
-def compute_feature_adoption(sessions: pd.DataFrame, feature_usage: pd.DataFrame):
-    session_users = sessions[["session_id", "user_id"]]
-    usage_with_users = feature_usage.merge(session_users, on="session_id", how="left").dropna()
+def join_usage_with_users(sessions: pd.DataFrame, feature_usage: pd.DataFrame) -> pd.DataFrame:
+    """Attach user ids to feature usage rows; computed once and shared by callers."""
+    usage_with_users = feature_usage.merge(
+        sessions[["session_id", "user_id"]],
+        on="session_id",
+        how="left",
+        validate="many_to_one",
+    ).dropna(subset=["user_id"])
+    # Categorical feature names give the groupbys integer codes to hash.
+    usage_with_users["feature_name"] = usage_with_users["feature_name"].astype("category")
+    return usage_with_users
+
+
+def count_feature_user_pairs(usage_with_users: pd.DataFrame) -> pd.Series:
+    """Event counts per unique (feature, user) pair; one hash pass, shared below."""
+    return usage_with_users.groupby(["feature_name", "user_id"], observed=True).size()
+
 
+def compute_feature_adoption(sessions: pd.DataFrame, pair_counts: pd.Series):
     active_user_count = sessions["user_id"].nunique()
     feature_user_counts = (
-        usage_with_users.drop_duplicates(subset=["user_id", "feature_name"])
-        .groupby("feature_name")["user_id"]
-        .nunique()
+        pair_counts.groupby(level="feature_name", observed=True)
+        .size()
         .sort_values(ascending=False)
     )
 
-    overall_adopters = usage_with_users["user_id"].nunique()
-    adoption_table = []
-    for feature, count in feature_user_counts.items():
-        adoption_table.append(
-            {
-                "feature_name": feature,
-                "unique_users": int(count),
-                "adoption_rate": count / active_user_count,
-            }
-        )
+    overall_adopters = pair_counts.index.get_level_values("user_id").nunique()
+    adoption_df = feature_user_counts.rename("unique_users").reset_index()
+    adoption_df["adoption_rate"] = adoption_df["unique_users"] / active_user_count
+    adoption_table = adoption_df.to_dict(orient="records")
 
     overall_rate = overall_adopters / active_user_count if active_user_count else 0.0
 
@@ -78,28 +86,27 @@ def compute_feature_adoption(sessions: pd.DataFrame, feature_usage: pd.DataFrame
 
 
 def compute_retention(users: pd.DataFrame, sessions: pd.DataFrame):
-    sessions = sessions.copy()
-    sessions = sessions.merge(
-        users[["user_id", "signup_date"]], on="user_id", how="left", validate="many_to_one"
-    )
-    sessions["session_date"] = sessions["start_time"].dt.normalize()
-    sessions["day_diff"] = (sessions["session_date"] - sessions["signup_date"]).dt.days
-    sessions = sessions[sessions["day_diff"] >= 0]
+    signup = sessions["user_id"].map(users.set_index("user_id")["signup_date"])
+    day_diff = (sessions["start_time"].dt.normalize() - signup).dt.days
+    valid = day_diff >= 0
 
-    day_diffs = sessions.groupby("user_id")["day_diff"].apply(set)
-    base_users = int(day_diffs.shape[0])
+    base_users = int(sessions.loc[valid, "user_id"].nunique())
 
     retention_days = [1, 7, 30]
-    retention = []
-    for day in retention_days:
-        retained = sum(1 for diffs in day_diffs if day in diffs)
-        retention.append(
-            {
-                "day": day,
-                "retained_users": retained,
-                "retention_rate": retained / base_users if base_users else 0.0,
-            }
-        )
+    hits = pd.DataFrame(
+        {"user_id": sessions["user_id"], "day_diff": day_diff}
+    ).loc[day_diff.isin(retention_days)]
+    retained_by_day = (
+        hits.groupby("day_diff")["user_id"].nunique().reindex(retention_days, fill_value=0)
+    )
+    retention = [
+        {
+            "day": day,
+            "retained_users": int(retained_by_day[day]),
+            "retention_rate": retained_by_day[day] / base_users if base_users else 0.0,
+        }
+        for day in retention_days
+    ]
 
     return retention, base_users
 
@@ -111,50 +118,59 @@ def phi_coefficient(tp: int, fn: int, fp: int, tn: int) -> float:
     return (tp * tn - fp * fn) / denominator
 
 
+def _phi_vec(tp, fp, fn, tn) -> np.ndarray:
+    tp, fp, fn, tn = (np.asarray(x, dtype=float) for x in (tp, fp, fn, tn))
+    denominator = np.sqrt((tp + fp) * (tp + fn) * (tn + fp) * (tn + fn))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        phi = (tp * tn - fp * fn) / denominator
+    return np.where(denominator == 0, 0.0, phi)
+
+
 def compute_feature_repeat_correlation(
-    users: pd.DataFrame, sessions: pd.DataFrame, feature_usage: pd.DataFrame
+    users: pd.DataFrame, sessions: pd.DataFrame, pair_counts: pd.Series
 ):
     session_counts = sessions.groupby("user_id")["session_id"].count()
     repeat_series = (session_counts >= 2).astype(int)
     repeat_series = repeat_series.reindex(users["user_id"], fill_value=0)
 
-    feature_users = (
-        feature_usage.merge(sessions[["session_id", "user_id"]], on="session_id", how="left")
-        .dropna(subset=["user_id"])
-        .drop_duplicates(subset=["user_id", "feature_name"])
-    )
+    feature_users = pair_counts.index.to_frame(index=False)
 
     user_count = repeat_series.shape[0]
     repeat_total = int(repeat_series.sum())
 
-    stats = []
-    for feature, group in feature_users.groupby("feature_name"):
-        users_used = set(group["user_id"].tolist())
-        used_count = len(users_used)
+    feature_users = feature_users.merge(
+        repeat_series.rename("is_repeat").rename_axis("user_id").reset_index(),
+        on="user_id",
+        how="left",
+    )
+    per_feature = feature_users.groupby("feature_name", observed=True).agg(
+        users_used=("user_id", "nunique"), tp=("is_repeat", "sum")
+    )
 
-        tp = sum(repeat_series.get(user, 0) for user in users_used)
-        fp = used_count - tp
-        fn = repeat_total - tp
-        tn = user_count - (tp + fp + fn)
+    return finish_repeat_stats(per_feature, repeat_total, user_count)
 
-        repeat_rate_used = tp / used_count if used_count else 0.0
-        not_used_count = user_count - used_count
-        repeat_rate_not_used = (
-            (repeat_total - tp) / not_used_count if not_used_count else 0.0
-        )
 
-        stats.append(
-            {
-                "feature_name": feature,
-                "users_used": used_count,
-                "repeat_rate_used": repeat_rate_used,
-                "repeat_rate_not_used": repeat_rate_not_used,
-                "repeat_rate_lift": repeat_rate_used - repeat_rate_not_used,
-                "phi": phi_coefficient(tp, fn, fp, tn),
-            }
-        )
+def finish_repeat_stats(per_feature: pd.DataFrame, repeat_total: int, user_count: int):
+    """Derive rates and phi from per-feature users_used/tp counts."""
+    tp = per_feature["tp"]
+    fp = per_feature["users_used"] - tp
+    fn = repeat_total - tp
+    tn = user_count - tp - fp - fn
+
+    not_used = user_count - per_feature["users_used"]
+    per_feature["repeat_rate_used"] = (tp / per_feature["users_used"]).fillna(0.0)
+    per_feature["repeat_rate_not_used"] = ((repeat_total - tp) / not_used).fillna(0.0)
+    per_feature["repeat_rate_lift"] = (
+        per_feature["repeat_rate_used"] - per_feature["repeat_rate_not_used"]
+    )
+    per_feature["phi"] = _phi_vec(tp, fp, fn, tn)
 
-    stats.sort(key=lambda x: x["phi"], reverse=True)
+    stats = (
+        per_feature.drop(columns="tp")
+        .sort_values("phi", ascending=False)
+        .reset_index()
+        .to_dict(orient="records")
+    )
     return stats
 
 
@@ -209,65 +225,215 @@ def render_markdown(
     if dau_tail.empty:
         lines.append("No daily activity recorded.\n")
     else:
-        lines.append("| Date | Active Users |\n| --- | ---: |\n")
-        for date, count in dau_tail.items():
-            lines.append(f"| {date} | {count} |\n")
+        lines.append(
+            pd.DataFrame({"Date": dau_tail.index, "Active Users": dau_tail.values})
+            .to_markdown(index=False)
+        )
 
     lines.append("\n### Weekly Active Users (last 6 weeks of data)\n")
     wau_tail = wau.tail(6)
     if wau_tail.empty:
         lines.append("No weekly activity recorded.\n")
     else:
-        lines.append("| Week (Mon start) | Active Users |\n| --- | ---: |\n")
-        for week, count in wau_tail.items():
-            lines.append(f"| {week} | {count} |\n")
-
-    lines.append("\n### Feature Adoption Detail\n")
-    lines.append("| Feature | Users | Adoption Rate |\n| --- | ---: | ---: |")
-    for row in adoption_table:
         lines.append(
-            f"| {row['feature_name']} | {row['unique_users']} | {format_percentage(row['adoption_rate'])} |"
+            pd.DataFrame(
+                {"Week (Mon start)": wau_tail.index.astype(str), "Active Users": wau_tail.values}
+            ).to_markdown(index=False)
         )
 
+    lines.append("\n### Feature Adoption Detail\n")
+    adoption_df = pd.DataFrame(adoption_table)
+    adoption_df["adoption_rate"] = adoption_df["adoption_rate"].map(format_percentage)
+    adoption_df.columns = ["Feature", "Users", "Adoption Rate"]
+    lines.append(adoption_df.to_markdown(index=False))
+
     lines.append("\n### Retention Summary\n")
-    lines.append("| Day | Retained Users | Retention Rate |\n| ---: | ---: | ---: |")
-    for row in retention:
-        lines.append(
-            f"| {row['day']} | {row['retained_users']} | {format_percentage(row['retention_rate'])} |"
-        )
+    retention_df = pd.DataFrame(retention)
+    retention_df["retention_rate"] = retention_df["retention_rate"].map(format_percentage)
+    retention_df.columns = ["Day", "Retained Users", "Retention Rate"]
+    lines.append(retention_df.to_markdown(index=False))
 
     lines.append("\n### Features Correlated with Repeat Sessions\n")
     lines.append(
         "Repeat sessions defined as users with 2+ sessions in the period. Phi coefficients capture the strength of\n"
         "association between touching a feature and being a repeat user (higher = stronger positive correlation).\n"
     )
-    lines.append(
-        "| Feature | Users | Repeat Rate (Used) | Repeat Rate (Not Used) | Lift | Phi |\n| --- | ---: | ---: | ---: | ---: | ---: |"
+    repeat_df = pd.DataFrame(feature_repeat_stats)
+    for column in ("repeat_rate_used", "repeat_rate_not_used", "repeat_rate_lift"):
+        repeat_df[column] = repeat_df[column].map(format_percentage)
+    repeat_df["phi"] = repeat_df["phi"].map("{:.3f}".format)
+    repeat_df.columns = [
+        "Feature",
+        "Users",
+        "Repeat Rate (Used)",
+        "Repeat Rate (Not Used)",
+        "Lift",
+        "Phi",
+    ]
+    lines.append(repeat_df.to_markdown(index=False))
+
+    return "\n".join(lines) + "\n"
+
+
+def compute_all_pandas():
+    users, sessions, feature_usage, feedback = load_datasets()
+
+    usage_with_users = join_usage_with_users(sessions, feature_usage)
+    pair_counts = count_feature_user_pairs(usage_with_users)
+
+    # The four stages are independent once the frames are loaded. Threads are
+    # used rather than processes so the input frames are shared instead of
+    # pickled per worker; the heavy groupby/merge kernels release the GIL.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        activity_future = pool.submit(compute_activity_metrics, sessions)
+        adoption_future = pool.submit(compute_feature_adoption, sessions, pair_counts)
+        retention_future = pool.submit(compute_retention, users, sessions)
+        repeat_future = pool.submit(
+            compute_feature_repeat_correlation, users, sessions, pair_counts
+        )
+
+        dau, wau, dau_summary, wau_summary = activity_future.result()
+        adoption_table, overall_rate, active_user_count = adoption_future.result()
+        retention, retention_base = retention_future.result()
+        feature_repeat_stats = repeat_future.result()
+
+    return (
+        dau,
+        wau,
+        dau_summary,
+        wau_summary,
+        adoption_table,
+        overall_rate,
+        active_user_count,
+        retention,
+        retention_base,
+        feature_repeat_stats,
     )
-    for row in feature_repeat_stats:
-        lines.append(
-            "| {feature} | {users} | {rru} | {rrn} | {lift} | {phi} |".format(
-                feature=row["feature_name"],
-                users=row["users_used"],
-                rru=format_percentage(row["repeat_rate_used"]),
-                rrn=format_percentage(row["repeat_rate_not_used"]),
-                lift=format_percentage(row["repeat_rate_lift"]),
-                phi=f"{row['phi']:.3f}",
-            )
+
+
+def compute_all_duckdb():
+    """Run every aggregation as SQL inside DuckDB and hand frames back to pandas.
+
+    Produces the same structures as the pandas path; week buckets use
+    DuckDB's Monday-start date_trunc instead of pandas W-MON periods.
+    """
+    try:
+        import duckdb
+    except ImportError:
+        raise SystemExit("duckdb is required for --engine=duckdb (pip install duckdb)")
+
+    con = duckdb.connect()
+    for name in ("users", "sessions", "feature_usage", "feedback"):
+        path = os.path.join(data_io.DATA_DIR, f"{name}.csv")
+        con.execute(
+            f"CREATE VIEW {name} AS SELECT * FROM read_csv_auto('{path}', header=true)"
         )
 
-    return "\n".join(lines) + "\n"
+    dau_df = con.execute(
+        "SELECT CAST(start_time AS DATE) AS date, COUNT(DISTINCT user_id) AS users"
+        " FROM sessions GROUP BY 1 ORDER BY 1"
+    ).fetchdf()
+    dau = dau_df.set_index(dau_df["date"].dt.date)["users"].rename_axis("date")
+
+    wau_df = con.execute(
+        "SELECT date_trunc('week', start_time) AS week, COUNT(DISTINCT user_id) AS users"
+        " FROM sessions GROUP BY 1 ORDER BY 1"
+    ).fetchdf()
+    wau = wau_df.set_index(wau_df["week"].dt.date)["users"].rename_axis("week")
+
+    dau_summary = summarize_active_counts(dau, "days_observed")
+    wau_summary = summarize_active_counts(wau, "weeks_observed")
+
+    active_user_count = con.execute(
+        "SELECT COUNT(DISTINCT user_id) FROM sessions"
+    ).fetchone()[0]
+    adoption_df = con.execute(
+        "SELECT fu.feature_name, COUNT(DISTINCT s.user_id) AS unique_users"
+        " FROM feature_usage fu JOIN sessions s USING (session_id)"
+        " GROUP BY 1 ORDER BY unique_users DESC"
+    ).fetchdf()
+    adoption_df["adoption_rate"] = adoption_df["unique_users"] / active_user_count
+    adoption_table = adoption_df.to_dict(orient="records")
+    overall_adopters = con.execute(
+        "SELECT COUNT(DISTINCT s.user_id) FROM feature_usage fu"
+        " JOIN sessions s USING (session_id)"
+    ).fetchone()[0]
+    overall_rate = overall_adopters / active_user_count if active_user_count else 0.0
 
+    con.execute(
+        "CREATE VIEW day_diffs AS"
+        " SELECT s.user_id, datediff('day', u.signup_date, CAST(s.start_time AS DATE)) AS day_diff"
+        " FROM sessions s JOIN users u USING (user_id)"
+    )
+    retention_base = con.execute(
+        "SELECT COUNT(DISTINCT user_id) FROM day_diffs WHERE day_diff >= 0"
+    ).fetchone()[0]
+    retained_df = con.execute(
+        "SELECT day_diff, COUNT(DISTINCT user_id) AS retained FROM day_diffs"
+        " WHERE day_diff IN (1, 7, 30) GROUP BY 1"
+    ).fetchdf()
+    retention_days = [1, 7, 30]
+    retained_by_day = (
+        retained_df.set_index("day_diff")["retained"].reindex(retention_days, fill_value=0)
+    )
+    retention = [
+        {
+            "day": day,
+            "retained_users": int(retained_by_day[day]),
+            "retention_rate": retained_by_day[day] / retention_base if retention_base else 0.0,
+        }
+        for day in retention_days
+    ]
+
+    con.execute(
+        "CREATE VIEW repeat_users AS"
+        " SELECT user_id, CASE WHEN COUNT(*) >= 2 THEN 1 ELSE 0 END AS is_repeat"
+        " FROM sessions GROUP BY user_id"
+    )
+    per_feature = (
+        con.execute(
+            "WITH pairs AS ("
+            " SELECT DISTINCT s.user_id, fu.feature_name"
+            " FROM feature_usage fu JOIN sessions s USING (session_id))"
+            " SELECT p.feature_name, COUNT(*) AS users_used, SUM(r.is_repeat) AS tp"
+            " FROM pairs p JOIN repeat_users r USING (user_id) GROUP BY 1"
+        )
+        .fetchdf()
+        .set_index("feature_name")
+    )
+    user_count = con.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    repeat_total = con.execute(
+        "SELECT COUNT(*) FROM repeat_users WHERE is_repeat = 1"
+    ).fetchone()[0]
+    feature_repeat_stats = finish_repeat_stats(per_feature, repeat_total, user_count)
 
-def main():
-    os.makedirs(REPORT_DIR, exist_ok=True)
+    return (
+        dau,
+        wau,
+        dau_summary,
+        wau_summary,
+        adoption_table,
+        overall_rate,
+        active_user_count,
+        retention,
+        retention_base,
+        feature_repeat_stats,
+    )
 
-    users, sessions, feature_usage, feedback = load_datasets()
 
-    dau, wau, dau_summary, wau_summary = compute_activity_metrics(sessions)
-    adoption_table, overall_rate, active_user_count = compute_feature_adoption(sessions, feature_usage)
-    retention, retention_base = compute_retention(users, sessions)
-    feature_repeat_stats = compute_feature_repeat_correlation(users, sessions, feature_usage)
+def write_summary(results):
+    (
+        dau,
+        wau,
+        dau_summary,
+        wau_summary,
+        adoption_table,
+        overall_rate,
+        active_user_count,
+        retention,
+        retention_base,
+        feature_repeat_stats,
+    ) = results
 
     markdown = render_markdown(
         dau_summary,
@@ -289,5 +455,28 @@ def main():
     print("Metrics summary generated at:", output_path)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the product metrics summary.")
+    parser.add_argument(
+        "--engine",
+        choices=("pandas", "duckdb"),
+        default="pandas",
+        help="Computation engine; duckdb pushes all aggregations into one SQL session.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+    if args.engine == "duckdb":
+        results = compute_all_duckdb()
+    else:
+        results = compute_all_pandas()
+
+    write_summary(results)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "mock_data")
+
+# Explicit columns and narrow dtypes: categories group on integer codes and
+# cut the bytes every downstream merge/groupby has to traverse.
+SCHEMAS = {
+    "users.csv": {
+        "usecols": ["user_id", "signup_date", "channel", "region"],
+        "dtype": {"channel": "category", "region": "category"},
+        "parse_dates": ["signup_date"],
+    },
+    "sessions.csv": {
+        "usecols": ["session_id", "user_id", "start_time", "end_time", "device_type"],
+        "dtype": {"device_type": "category"},
+        "parse_dates": ["start_time", "end_time"],
+    },
+    "feature_usage.csv": {
+        "usecols": ["session_id", "feature_name", "usage_timestamp"],
+        "dtype": {"feature_name": "category"},
+        "parse_dates": ["usage_timestamp"],
+    },
+    "feedback.csv": {
+        "usecols": ["feedback_id", "user_id", "rating", "feature_name", "comments", "session_id"],
+        "dtype": {"rating": "int8", "feature_name": "category"},
+        "parse_dates": [],
+    },
+}
+
+
+def read_table(filename: str) -> pd.DataFrame:
+    filepath = os.path.join(DATA_DIR, filename)
+    parquet_path = os.path.splitext(filepath)[0] + ".parquet"
+    schema = SCHEMAS.get(filename, {})
+
+    # Parquet shadow: typed columnar storage loads far faster than CSV and
+    # keeps timestamps as datetime64, so no re-parsing on subsequent runs.
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(
+        filepath
+    ):
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass
+
+    try:
+        # PyArrow parses CSVs multithreaded and skips the slow Python date parser.
+        df = pd.read_csv(filepath, engine="pyarrow", **schema)
+    except ImportError:
+        df = pd.read_csv(filepath, **schema)
+
+    try:
+        df.to_parquet(parquet_path, engine="pyarrow", compression="zstd")
+    except (ImportError, OSError):
+        pass
+
+    return df
+
+
+# 1970-01-05 was the first Monday after the epoch.
+_MONDAY_EPOCH_DAY = 4
+
+
+def monday_week_starts(timestamps) -> np.ndarray:
+    """Truncate datetime64 values to their Monday week start, as int64 day numbers.
+
+    Plain int64 keys hit the fast integer hash-grouper in pandas, unlike
+    PeriodArray keys; convert back with .astype('datetime64[D]') for labels.
+    """
+    days = np.asarray(timestamps, dtype="datetime64[D]").view("int64")
+    return days - (days - _MONDAY_EPOCH_DAY) % 7
+
+
+def write_csv_snapshot(df: pd.DataFrame, filepath: str):
+    """Write a reference CSV, using Arrow's multithreaded writer when available."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        df.to_csv(filepath, index=False)
+        return
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), filepath)
+
+
+def load_datasets():
+    users = read_table("users.csv")
+    sessions = read_table("sessions.csv")
+    feature_usage = read_table("feature_usage.csv")
+    feedback = read_table("feedback.csv")
+    return users, sessions, feature_usage, feedback
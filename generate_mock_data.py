@@ -1,10 +1,18 @@
-import csv
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
 
-random.seed(42)
+
+# A private Random instance seeds the same Mersenne Twister stream as
+# random.seed(42) did, without routing every draw through the module-level
+# wrapper functions and their global instance lookup.
+_rand = random.Random(42)
+# Bulk draws for the session/usage/feedback hot paths run through NumPy's
+# PCG64 generator; one call fills an array instead of one call per row.
+rng = np.random.default_rng(42)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "mock_data")
 NUM_USERS = 600
@@ -45,140 +53,207 @@ FEEDBACK_COMMENTS = [
     "Great overall, but the insights could be more actionable.",
 ]
 
+def csv_field(value):
+    """Quote a field for CSV if needed; most columns here never need it."""
+    if '"' in value:
+        return '"' + value.replace('"', '""') + '"'
+    if "," in value or "\n" in value:
+        return f'"{value}"'
+    return value
+
+
+# The categorical columns draw from fixed vocabularies, so escape them for
+# CSV once at import; row emission then never re-checks quoting and every
+# draw shares the same string objects.
+CHANNELS_CSV = [csv_field(c) for c in CHANNELS]
+REGIONS_CSV = [csv_field(r) for r in REGIONS]
+DEVICE_TYPES_CSV = np.array([csv_field(d) for d in DEVICE_TYPES])
+FEATURES_CSV = np.array([csv_field(f) for f in FEATURES])
+FEEDBACK_COMMENTS_CSV = [csv_field(c) for c in FEEDBACK_COMMENTS]
+
 NOW = datetime(2025, 10, 5, 12, 0, 0)
 SIGNUP_START = datetime(2023, 1, 1)
+EPOCH = datetime(1970, 1, 1)
+TIMESTAMP_FMT = "%Y-%m-%d %H:%M:%S"
 
 
-def daterange(start, end):
-    delta_days = (end - start).days
-    return start + timedelta(days=random.randint(0, delta_days))
+def generate_users():
+    # Columns as parallel lists (SoA); rows are only zipped together at write
+    # time, so no per-row container is allocated.
+    user_ids = format_ids("U", NUM_USERS, 5)
+    # The draw bounds are loop-invariant: signups land between SIGNUP_START
+    # and a week before NOW, so the offset range is computed once.
+    max_signup_offset = ((NOW - timedelta(days=7)) - SIGNUP_START).days
+    signup_start_day = (SIGNUP_START - EPOCH).days
+    signup_dates = []
+    signup_days = np.empty(NUM_USERS, dtype=np.int64)
+    randint = _rand.randint  # bound method as a local: LOAD_FAST in the loop
+    for i in range(NUM_USERS):
+        offset = randint(0, max_signup_offset)
+        signup_dates.append((SIGNUP_START + timedelta(days=offset)).strftime("%Y-%m-%d"))
+        signup_days[i] = signup_start_day + offset
+    # choices(k=N) amortizes the population lookup over one C-level loop.
+    channels = _rand.choices(CHANNELS_CSV, k=NUM_USERS)
+    regions = _rand.choices(REGIONS_CSV, k=NUM_USERS)
+    # The epoch-day column rides along so generate_sessions never has to
+    # re-parse the formatted dates.
+    return (user_ids, signup_dates, channels, regions), signup_days
+
+
+def generate_sessions(user_ids, signup_days):
+    num_users = len(user_ids)
+    now_day = (NOW - EPOCH).days
+
+    # All randomness for all sessions is drawn in a handful of array calls.
+    sessions_per_user = rng.integers(
+        SESSION_RANGE_PER_USER[0], SESSION_RANGE_PER_USER[1] + 1, size=num_users
+    )
+    total_sessions = int(sessions_per_user.sum())
+    user_idx = np.repeat(np.arange(num_users), sessions_per_user)
+
+    day_offsets = rng.integers(0, now_day - signup_days[user_idx] + 1)
+    hours = rng.integers(6, 23, size=total_sessions)
+    minutes = rng.integers(0, 60, size=total_sessions)
+    duration_minutes = rng.integers(5, 161, size=total_sessions)
+    device_idx = rng.integers(0, len(DEVICE_TYPES), size=total_sessions)
+
+    start_epochs = (
+        (signup_days[user_idx] + day_offsets) * 86400 + hours * 3600 + minutes * 60
+    )
+    duration_seconds = duration_minutes * 60
+
+    session_ids = format_ids("S", total_sessions, 6)
+
+    columns = (
+        session_ids.tolist(),
+        np.asarray(user_ids)[user_idx].tolist(),
+        format_timestamps(start_epochs),
+        format_timestamps(start_epochs + duration_seconds),
+        DEVICE_TYPES_CSV[device_idx].tolist(),
+    )
+    session_ctx = {
+        "session_ids": session_ids,
+        "user_idx": user_idx,
+        "start_epochs": start_epochs,
+        "duration_seconds": duration_seconds,
+    }
+    return columns, session_ctx
 
 
-def timerange(start, end):
-    total_seconds = int((end - start).total_seconds())
-    return start + timedelta(seconds=random.randint(0, max(total_seconds, 1)))
+def format_ids(prefix, count, width):
+    """Build the full zero-padded id column ('U00001', ...) in one batch.
 
+    A single f-string list comprehension beats the np.char route here, and
+    the object dtype keeps real Python strings, so fancy-indexed gathers are
+    pointer loads and the row join never converts from np.str_.
+    """
+    return np.array([f"{prefix}{i:0{width}d}" for i in range(1, count + 1)], dtype=object)
 
-def generate_users():
-    users = []
-    for idx in range(1, NUM_USERS + 1):
-        signup_date = daterange(SIGNUP_START, NOW - timedelta(days=7))
-        channel = random.choice(CHANNELS)
-        region = random.choice(REGIONS)
-        users.append(
-            {
-                "user_id": f"U{idx:05d}",
-                "signup_date": signup_date.strftime("%Y-%m-%d"),
-                "channel": channel,
-                "region": region,
-            }
-        )
-    return users
-
-
-def generate_sessions(users):
-    sessions = []
-    session_lookup = {}
-    session_id_counter = 1
-
-    for user in users:
-        num_sessions = random.randint(*SESSION_RANGE_PER_USER)
-        user_sessions = []
-        signup_date = datetime.strptime(user["signup_date"], "%Y-%m-%d")
-        earliest_session_date = signup_date
-
-        for _ in range(num_sessions):
-            session_day = daterange(earliest_session_date, NOW)
-            session_start = datetime.combine(session_day.date(), datetime.min.time()) + timedelta(
-                hours=random.randint(6, 22), minutes=random.randint(0, 59)
-            )
-            duration_minutes = random.randint(5, 160)
-            session_end = session_start + timedelta(minutes=duration_minutes)
-            device_type = random.choice(DEVICE_TYPES)
-
-            session_id = f"S{session_id_counter:06d}"
-            session_id_counter += 1
-
-            session_record = {
-                "session_id": session_id,
-                "user_id": user["user_id"],
-                "start_time": session_start.strftime("%Y-%m-%d %H:%M:%S"),
-                "end_time": session_end.strftime("%Y-%m-%d %H:%M:%S"),
-                "device_type": device_type,
-            }
-            sessions.append(session_record)
-            user_sessions.append(
-                {
-                    "session_id": session_id,
-                    "start": session_start,
-                    "end": session_end,
-                }
-            )
-
-        session_lookup[user["user_id"]] = user_sessions
-
-    return sessions, session_lookup
-
-
-def generate_feature_usage(session_lookup):
-    usage_records = []
-    for user_sessions in session_lookup.values():
-        for session in user_sessions:
-            num_features = random.randint(*FEATURES_PER_SESSION_RANGE)
-            features_used = random.sample(FEATURES, k=num_features)
-            for feature in features_used:
-                usage_ts = timerange(session["start"], session["end"])
-                usage_records.append(
-                    {
-                        "session_id": session["session_id"],
-                        "feature_name": feature,
-                        "usage_timestamp": usage_ts.strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                )
-    return usage_records
-
-
-def generate_feedback(users, session_lookup):
-    feedback_records = []
-    feedback_id_counter = 1
-    for user in users:
-        user_id = user["user_id"]
-        sessions = session_lookup[user_id]
-        for session in sessions:
-            if random.random() <= FEEDBACK_PROBABILITY:
-                rating = random.randint(1, 5)
-                feature = random.choice(FEATURES)
-                comment = random.choice(FEEDBACK_COMMENTS)
-                feedback_records.append(
-                    {
-                        "feedback_id": f"F{feedback_id_counter:06d}",
-                        "user_id": user_id,
-                        "rating": rating,
-                        "feature_name": feature,
-                        "comments": comment,
-                        "session_id": session["session_id"],
-                    }
-                )
-                feedback_id_counter += 1
-    return feedback_records
-
-
-def write_csv(filename, fieldnames, rows):
+
+def format_timestamps(epochs):
+    # One vectorized cast per column instead of a strftime call per row; the
+    # datetime64 string form only differs from TIMESTAMP_FMT by the 'T'.
+    formatted = np.asarray(epochs, dtype="datetime64[s]").astype("U19")
+    return np.char.replace(formatted, "T", " ").tolist()
+
+
+def generate_feature_usage(session_ctx, rng):
+    total_sessions = len(session_ctx["session_ids"])
+    feature_count = len(FEATURES)
+
+    features_per_session = rng.integers(
+        FEATURES_PER_SESSION_RANGE[0], FEATURES_PER_SESSION_RANGE[1] + 1, size=total_sessions
+    )
+    # Sampling without replacement for every session at once: argsort of a
+    # random matrix yields a permutation per row; keep the first k columns.
+    permutations = rng.random((total_sessions, feature_count)).argsort(axis=1)
+    keep = np.arange(feature_count) < features_per_session[:, None]
+    feature_idx = permutations[keep]
+
+    session_idx = np.repeat(np.arange(total_sessions), features_per_session)
+    offsets = rng.integers(
+        0, np.maximum(session_ctx["duration_seconds"][session_idx], 1) + 1
+    )
+    usage_epochs = session_ctx["start_epochs"][session_idx] + offsets
+
+    return (
+        session_ctx["session_ids"][session_idx].tolist(),
+        FEATURES_CSV[feature_idx].tolist(),
+        format_timestamps(usage_epochs),
+    )
+
+
+def generate_feedback(user_ids, session_ctx, rng):
+    total_sessions = len(session_ctx["session_ids"])
+    left_feedback = rng.random(total_sessions) <= FEEDBACK_PROBABILITY
+    total_feedback = int(left_feedback.sum())
+
+    ratings = rng.integers(1, 6, size=total_feedback)
+    feature_idx = rng.integers(0, len(FEATURES), size=total_feedback)
+    comment_idx = rng.integers(0, len(FEEDBACK_COMMENTS), size=total_feedback)
+
+    feedback_user_idx = session_ctx["user_idx"][left_feedback]
+
+    return (
+        format_ids("F", total_feedback, 6).tolist(),
+        np.asarray(user_ids)[feedback_user_idx].tolist(),
+        ratings.astype(str).tolist(),
+        FEATURES_CSV[feature_idx].tolist(),
+        [FEEDBACK_COMMENTS_CSV[i] for i in comment_idx],
+        session_ctx["session_ids"][left_feedback].tolist(),
+    )
+
+
+WRITE_BATCH_ROWS = 65536
+
+
+def _write_csv_arrow(filepath, fieldnames, columns):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    table = pa.table({name: pa.array(col) for name, col in zip(fieldnames, columns)})
+    # quoting_style='none' keeps the bytes identical to the Python path and
+    # raises rather than silently quoting if a column ever stops being safe;
+    # the header is written by hand because Arrow always quotes its own.
+    options = pacsv.WriteOptions(include_header=False, quoting_style="none")
+    with open(filepath, "wb") as sink:
+        sink.write((",".join(fieldnames) + "\n").encode("utf-8"))
+        pacsv.write_csv(table, sink, write_options=options)
+
+
+def write_csv(filename, fieldnames, columns, pre_quoted=False):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     filepath = os.path.join(OUTPUT_DIR, filename)
-    with open(filepath, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    # Tables whose fields never need quoting can go through Arrow's C++
+    # writer; the feedback table carries pre-escaped comment fields that
+    # Arrow would double-quote, so it stays on the Python path.
+    if not pre_quoted:
+        try:
+            _write_csv_arrow(filepath, fieldnames, columns)
+            return filepath
+        except ImportError:
+            pass
+    # Columns arrive as parallel lists of CSV-safe strings. Rows are joined,
+    # encoded and written in bounded batches, so the writer never holds more
+    # than WRITE_BATCH_ROWS rendered rows no matter how far the row-count
+    # knobs are turned up; each flush is still one raw write.
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        batch = [",".join(fieldnames)]
+        for row in zip(*columns):
+            batch.append(",".join(row))
+            if len(batch) >= WRITE_BATCH_ROWS:
+                batch.append("")
+                os.write(fd, "\n".join(batch).encode("utf-8"))
+                batch = []
+        batch.append("")
+        os.write(fd, "\n".join(batch).encode("utf-8"))
+    finally:
+        os.close(fd)
     return filepath
 
 
 def main():
-    users = generate_users()
-    sessions, session_lookup = generate_sessions(users)
-    feature_usage = generate_feature_usage(session_lookup)
-    feedback = generate_feedback(users, session_lookup)
-
     files = {
         "users.csv": ("user_id", "signup_date", "channel", "region"),
         "sessions.csv": ("session_id", "user_id", "start_time", "end_time", "device_type"),
@@ -193,17 +268,45 @@ def main():
         ),
     }
 
-    paths = {}
-    paths["users"] = write_csv("users.csv", files["users.csv"], users)
-    paths["sessions"] = write_csv("sessions.csv", files["sessions.csv"], sessions)
-    paths["feature_usage"] = write_csv("feature_usage.csv", files["feature_usage.csv"], feature_usage)
-    paths["feedback"] = write_csv("feedback.csv", files["feedback.csv"], feedback)
+    # A single background writer drains each finished table to disk while
+    # the next table is still being generated; one worker keeps the writes
+    # ordered and avoids contending for the disk.
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        write_futures = {}
+
+        users, signup_days = generate_users()
+        user_ids = users[0]
+        write_futures["users"] = writer.submit(write_csv, "users.csv", files["users.csv"], users)
+
+        sessions, session_ctx = generate_sessions(user_ids, signup_days)
+        write_futures["sessions"] = writer.submit(
+            write_csv, "sessions.csv", files["sessions.csv"], sessions
+        )
+
+        # feature_usage and feedback only depend on the session context, so
+        # they run concurrently; each gets its own spawned child generator so
+        # the parallel draws stay deterministic regardless of scheduling.
+        usage_rng, feedback_rng = rng.spawn(2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            usage_future = pool.submit(generate_feature_usage, session_ctx, usage_rng)
+            feedback_future = pool.submit(generate_feedback, user_ids, session_ctx, feedback_rng)
+            feature_usage = usage_future.result()
+            feedback = feedback_future.result()
+
+        write_futures["feature_usage"] = writer.submit(
+            write_csv, "feature_usage.csv", files["feature_usage.csv"], feature_usage
+        )
+        write_futures["feedback"] = writer.submit(
+            write_csv, "feedback.csv", files["feedback.csv"], feedback, pre_quoted=True
+        )
+
+        paths = {key: future.result() for key, future in write_futures.items()}
 
     summary = {
-        "users": len(users),
-        "sessions": len(sessions),
-        "feature_usage": len(feature_usage),
-        "feedback": len(feedback),
+        "users": len(user_ids),
+        "sessions": len(sessions[0]),
+        "feature_usage": len(feature_usage[0]),
+        "feedback": len(feedback[0]),
     }
 
     print("Mock data generated:")